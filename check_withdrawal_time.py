@@ -1,21 +1,186 @@
-import requests
+import asyncio
+import httpx
 import argparse
 import yaml
 import json
 import csv
 import time
 import sys
-from datetime import datetime, timezone
+import os
+import random
+from operator import itemgetter
+from itertools import islice
+from email.utils import parsedate_to_datetime
+
+# Prefer the libyaml-backed loader, it parses large operator files much faster
+try:
+    from yaml import CSafeLoader as SafeLoader
+except ImportError:
+    from yaml import SafeLoader
+
+# orjson parses the (potentially huge) index map JSON and beacon responses several times faster
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# NumPy vectorizes the epoch -> timestamp math over a whole batch
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# diskcache keeps beacon responses around between runs
+try:
+    import diskcache
+except ImportError:
+    diskcache = None
+
+# ijson lets index maps too large to hold in memory be streamed
+try:
+    import ijson
+except ImportError:
+    ijson = None
+
+# Constants for "Far Future" (never exited)
+# Usually ~1.8e19
+FAR_FUTURE = 100000000000
+
+# ISO 8601 UTC timestamp, filled from time.gmtime()[:6] in a single % format
+ISO_FMT = "%04d-%02d-%02dT%02d:%02d:%02d+00:00"
+
+# Conversion: 32000000000 = 1 GNO
+GNO_DIVISOR = 32_000_000_000
+
+# Pulls the required fields used by calculate_withdrawal_info out of the inner validator dict
+_validator_fields = itemgetter('pubkey', 'exit_epoch', 'withdrawable_epoch')
+
+# Default max number of beacon requests in flight at once during batch processing
+DEFAULT_CONCURRENCY = 32
+# Max number of ids sent in one bulk validators request
+BULK_CHUNK_SIZE = 200
+# Bulk requests are scheduled in groups of this many (or --concurrency, if larger)
+# so huge batches never hold every pending request coroutine at once
+TASK_GROUP_SIZE = 64
+# Statuses of validators that have started exiting, see preflight_exited
+EXITED_STATUSES = ['active_exiting', 'exited_slashed', 'exited_unslashed', 'withdrawal_possible', 'withdrawal_done']
+# Index map files larger than this are streamed with ijson, if installed
+STREAM_JSON_THRESHOLD = 1 << 30
+
+# On-disk cache for beacon responses, reused across runs within --cache-ttl
+CACHE_DIR = os.path.expanduser("~/.cache/gnosis-withdraw")
+
+CSV_FIELDNAMES = ['pubkey', 'withdrawable_epoch', 'withdrawable_time_iso', 'time_remaining', 'effective_balance_gno', 'status', 'note']
+GNO_COLUMN = CSV_FIELDNAMES.index('effective_balance_gno')
+
+# HTTP client settings, connection errors are retried by the transport
+HTTP_TIMEOUT = 30.0
+CONNECT_RETRIES = 3
+
+# Retry policy for rate limited / overloaded beacon responses
+RETRY_STATUSES = (429, 502, 503, 504)
+MAX_RETRIES = 5
+MAX_BACKOFF = 30
+BACKOFF_JITTER = 0.25
+
+# Bulk POST rejections meaning the node lacks the POST form, retried as a GET query
+GET_FALLBACK_STATUSES = (400, 404, 405, 415)
+# Max ids per GET fallback query, 64 pubkeys keep the URL under common 8 KB limits
+GET_CHUNK_SIZE = 64
+
+# --- Rate Limiting ---
+
+class TokenBucket:
+    """Asyncio token bucket limiting how fast requests are issued to the node."""
+
+    def __init__(self, rate, capacity):
+        self.max_rate = rate
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.lock = asyncio.Lock()
+
+    async def acquire(self):
+        """Waits until a token is available, then consumes it."""
+        async with self.lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+    def update_from_headers(self, headers):
+        """Tunes the refill rate from X-RateLimit-Remaining/-Reset headers, if present."""
+        try:
+            remaining = float(headers['X-RateLimit-Remaining'])
+            reset = float(headers['X-RateLimit-Reset'])
+        except (KeyError, ValueError):
+            return
+
+        # Reset is either seconds until the window resets or a unix timestamp
+        if reset > 1e9:
+            reset -= time.time()
+        if reset > 0:
+            self.rate = min(self.max_rate, max(remaining, 1) / reset)
+
+    def backoff_delay(self, headers, attempt):
+        """Records a rate limited response and returns how long to wait before retrying.
+
+        The delay grows with the request's own attempt number, so a burst of
+        429s across concurrent requests does not escalate every request's wait.
+        """
+        # Drain the bucket so other in-flight requests slow down too, refilling
+        # from now rather than from before the rate limited response
+        self.tokens = 0
+        self.updated = time.monotonic()
+        delay = retry_after_seconds(headers)
+        if delay is None:
+            delay = min(MAX_BACKOFF, 2 ** (attempt + 1)) + random.uniform(0, BACKOFF_JITTER)
+        return delay
+
+def retry_after_seconds(headers):
+    """Parses a Retry-After header (seconds or HTTP date) into seconds to wait."""
+    value = headers.get('Retry-After')
+    if value is None:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
 
 # --- Helper Functions ---
 
-def get_chain_config(beacon_url, session=None):
+def _json(resp):
+    """Decodes a response body, with orjson when it is installed."""
+    return orjson.loads(resp.content) if orjson else resp.json()
+
+async def request_json(client, bucket, method, url, **kwargs):
+    """Issues a rate limited request, backing off on RETRY_STATUSES only.
+
+    The wait honors Retry-After, else doubles with each retry of this
+    request (capped at MAX_BACKOFF).
+    """
+    for attempt in range(MAX_RETRIES + 1):
+        await bucket.acquire()
+        resp = await client.request(method, url, **kwargs)
+        bucket.update_from_headers(resp.headers)
+        if resp.status_code not in RETRY_STATUSES or attempt == MAX_RETRIES:
+            resp.raise_for_status()
+            return _json(resp)
+        await asyncio.sleep(bucket.backoff_delay(resp.headers, attempt))
+
+async def get_chain_config(beacon_url, client, bucket):
     """Fetches chain configuration (slots per epoch, seconds per slot)."""
-    s = session or requests
     try:
-        resp = s.get(f"{beacon_url}/eth/v1/config/spec")
-        resp.raise_for_status()
-        config = resp.json()['data']
+        config = (await request_json(client, bucket, 'GET', f"{beacon_url}/eth/v1/config/spec"))['data']
         return {
             'SECONDS_PER_SLOT': int(config['SECONDS_PER_SLOT']),
             'SLOTS_PER_EPOCH': int(config['SLOTS_PER_EPOCH']),
@@ -25,27 +190,22 @@ def get_chain_config(beacon_url, session=None):
         print(f"Error fetching chain config: {e}")
         return None
 
-def get_genesis_time(beacon_url, session=None):
+async def get_genesis_time(beacon_url, client, bucket):
     """Fetches genesis time."""
-    s = session or requests
     try:
-        resp = s.get(f"{beacon_url}/eth/v1/beacon/genesis")
-        resp.raise_for_status()
-        return int(resp.json()['data']['genesis_time'])
+        body = await request_json(client, bucket, 'GET', f"{beacon_url}/eth/v1/beacon/genesis")
+        return int(body['data']['genesis_time'])
     except Exception as e:
         print(f"Error fetching genesis time: {e}")
         return None
 
-def fetch_validator_data(beacon_url, validator_identifier, session=None):
+async def fetch_validator_data(beacon_url, validator_identifier, client, bucket):
     """Fetches validator status and epoch info from beacon node."""
-    s = session or requests
     try:
         # validator_identifier can be index or pubkey
-        resp = s.get(f"{beacon_url}/eth/v1/beacon/states/head/validators/{validator_identifier}")
-        resp.raise_for_status()
-        data = resp.json()['data']
-        return data
-    except requests.exceptions.HTTPError as e:
+        body = await request_json(client, bucket, 'GET', f"{beacon_url}/eth/v1/beacon/states/head/validators/{validator_identifier}")
+        return body['data']
+    except httpx.HTTPStatusError as e:
         if e.response.status_code == 404:
             return None # Validator not found
         print(f"HTTP Error fetching validator {validator_identifier}: {e}")
@@ -54,22 +214,114 @@ def fetch_validator_data(beacon_url, validator_identifier, session=None):
         print(f"Error fetching validator {validator_identifier}: {e}")
         return None
 
-def calculate_withdrawal_info(validator_data, genesis_time, slots_per_epoch, seconds_per_slot):
-    """Calculates withdrawal timestamps based on validator data."""
+async def preflight_exited(beacon_url, client, bucket):
+    """Fetches every exiting/exited validator in one call, keyed by both index and pubkey."""
+    try:
+        body = await request_json(client, bucket, 'GET', f"{beacon_url}/eth/v1/beacon/states/head/validators", params={'status': EXITED_STATUSES})
+        exited = {}
+        for entry in body['data']:
+            exited[str(entry['index'])] = entry
+            exited[entry['validator']['pubkey'].lower()] = entry
+        return exited
+    except Exception as e:
+        print(f"Error fetching exited validators: {e}")
+        return None
+
+async def fetch_validator_cached(beacon_url, validator_identifier, client, bucket, cache=None, ttl=60):
+    """fetch_validator_data with an optional on-disk TTL cache in front of it."""
+    if cache is None:
+        return await fetch_validator_data(beacon_url, validator_identifier, client, bucket)
+
+    key = (beacon_url, str(validator_identifier))
+    data = cache.get(key)
+    if data is None:
+        data = await fetch_validator_data(beacon_url, validator_identifier, client, bucket)
+        if data:
+            cache.set(key, data, expire=ttl)
+    return data
+
+async def fetch_validators_chunk(client, beacon_url, ids, sem, bucket, sleep=0.0):
+    """Fetches a chunk of validators in a single call to the bulk validators endpoint.
+
+    Returns the requested ids, the entries found for them and an error
+    message, entries being None if the whole chunk failed.
+    """
+    url = f"{beacon_url}/eth/v1/beacon/states/head/validators"
+    async with sem:
+        try:
+            try:
+                body = await request_json(client, bucket, 'POST', url, json={'ids': ids, 'statuses': []})
+            except httpx.HTTPStatusError as e:
+                if e.response.status_code not in GET_FALLBACK_STATUSES:
+                    raise
+                # Node predates the POST form, fall back to the GET query form,
+                # split up so the query string stays within URI length limits
+                data = []
+                for part in batched(ids, GET_CHUNK_SIZE):
+                    body = await request_json(client, bucket, 'GET', url, params={'id': ','.join(part)})
+                    data.extend(body['data'])
+                return ids, data, None
+            return ids, body['data'], None
+        except Exception as e:
+            print(f"Error fetching validators {ids[0]}..{ids[-1]}: {e}")
+            # Keep only the first line, httpx appends a documentation link
+            return ids, None, str(e).splitlines()[0] if str(e) else type(e).__name__
+        finally:
+            if sleep > 0:
+                await asyncio.sleep(sleep)
+
+def batched(iterable, n):
+    """Yields lists of up to n items from iterable (itertools.batched before 3.12)."""
+    it = iter(iterable)
+    while True:
+        group = list(islice(it, n))
+        if not group:
+            return
+        yield group
+
+async def fetch_validators_bulk(beacon_url, ids, client, bucket, concurrency, sleep=0.0, chunk=BULK_CHUNK_SIZE):
+    """Bulk fetches validators concurrently, yielding (ids, entries, error) per chunk as each completes."""
+    sem = asyncio.Semaphore(concurrency)
+    chunks = (ids[i:i + chunk] for i in range(0, len(ids), chunk))
+    for group in batched(chunks, max(TASK_GROUP_SIZE, concurrency)):
+        tasks = [fetch_validators_chunk(client, beacon_url, chunk_ids, sem, bucket, sleep) for chunk_ids in group]
+        for next_chunk in asyncio.as_completed(tasks):
+            yield await next_chunk
+
+def iso_utc(timestamp):
+    """Formats a unix timestamp as an ISO 8601 UTC string."""
+    return ISO_FMT % time.gmtime(timestamp)[:6]
+
+def format_remaining(seconds):
+    """Formats whole seconds like str(timedelta), e.g. '5 days, 3:15:22'."""
+    days, rem = divmod(int(seconds), 86400)
+    hours, rem = divmod(rem, 3600)
+    minutes, secs = divmod(rem, 60)
+    hms = f"{hours}:{minutes:02d}:{secs:02d}"
+    if days:
+        return f"{days} day{'s' if days != 1 else ''}, {hms}"
+    return hms
+
+def calculate_withdrawal_info(validator_data, genesis_time, slots_per_epoch, seconds_per_slot, withdrawal_time=None, now=None, mode='csv'):
+    """Calculates withdrawal timestamps based on validator data.
+
+    withdrawal_time optionally carries a precomputed (iso, seconds_remaining)
+    pair for withdrawable validators, see calculate_withdrawal_batch. Batch
+    callers pass a shared now (unix time) rather than reading the clock per validator.
+
+    With mode='print' withdrawable validators only get a raw
+    'withdrawable_timestamp', formatted later by print_withdrawal_info.
+    """
     if not validator_data:
         return None
 
     validator = validator_data['validator']
+    pubkey, exit_epoch, withdrawable_epoch = _validator_fields(validator)
     status = validator_data['status']
     index = validator_data['index']
-    pubkey = validator['pubkey']
-    
-    exit_epoch = int(validator['exit_epoch'])
-    withdrawable_epoch = int(validator['withdrawable_epoch'])
-    
-    # Constants for "Far Future" (never exited)
-    # Usually ~1.8e19
-    FAR_FUTURE = 100000000000 
+
+    exit_epoch = int(exit_epoch)
+    withdrawable_epoch = int(withdrawable_epoch)
 
     result = {
         'pubkey': pubkey,
@@ -89,8 +341,7 @@ def calculate_withdrawal_info(validator_data, genesis_time, slots_per_epoch, sec
         if exit_epoch < FAR_FUTURE:
              # In exit queue
              exit_timestamp = genesis_time + (exit_epoch * slots_per_epoch * seconds_per_slot)
-             exit_dt = datetime.fromtimestamp(exit_timestamp, tz=timezone.utc)
-             result['note'] = f"In Exit Queue. Est Exit: {exit_dt.isoformat()}"
+             result['note'] = f"In Exit Queue. Est Exit: {iso_utc(exit_timestamp)}"
         else:
              result['note'] = "Active (not exited)"
         
@@ -98,15 +349,20 @@ def calculate_withdrawal_info(validator_data, genesis_time, slots_per_epoch, sec
 
     # Calculate Timestamp
     withdrawal_timestamp = genesis_time + (withdrawable_epoch * slots_per_epoch * seconds_per_slot)
-    withdrawal_dt = datetime.fromtimestamp(withdrawal_timestamp, tz=timezone.utc)
-    
-    result['withdrawable_time_iso'] = withdrawal_dt.isoformat()
-    
-    now = datetime.now(timezone.utc)
-    time_remaining = withdrawal_dt - now
-    
-    if time_remaining.total_seconds() > 0:
-        result['time_remaining'] = str(time_remaining)
+
+    if mode == 'print':
+        # Console output shows only a few fields, skip the formatting and balance work
+        result['withdrawable_timestamp'] = withdrawal_timestamp
+        return result
+
+    if withdrawal_time:
+        result['withdrawable_time_iso'], time_remaining = withdrawal_time
+    else:
+        result['withdrawable_time_iso'] = iso_utc(withdrawal_timestamp)
+        time_remaining = int(withdrawal_timestamp - (now or time.time()))
+
+    if time_remaining > 0:
+        result['time_remaining'] = format_remaining(time_remaining)
         result['is_withdrawable'] = False
     else:
         result['time_remaining'] = "0:00:00"
@@ -114,12 +370,79 @@ def calculate_withdrawal_info(validator_data, genesis_time, slots_per_epoch, sec
         result['note'] = "Eligible for sweep"
 
     # Add Effective Balance
-    eff_bal_raw = int(validator.get('effective_balance', 0))
-    # Conversion: 32000000000 = 1 GNO
-    result['effective_balance_gno'] = eff_bal_raw / 32000000000
+    result['effective_balance_gno'] = int(validator.get('effective_balance', 0)) / GNO_DIVISOR
 
     return result
 
+def calculate_withdrawal_batch(validators_data, genesis_time, slots_per_epoch, seconds_per_slot):
+    """Runs calculate_withdrawal_info over a batch, vectorizing the timestamp math with NumPy.
+
+    Withdrawable timestamps, ISO strings and remaining times are computed in a
+    single pass; missing or not yet withdrawable validators use the scalar path.
+    """
+    now = time.time()
+    if np is None:
+        return [calculate_withdrawal_info(v, genesis_time, slots_per_epoch, seconds_per_slot, now=now) for v in validators_data]
+
+    results = [None] * len(validators_data)
+    withdrawable = [] # Positions of validators with a withdrawable epoch
+    for i, v in enumerate(validators_data):
+        if v and int(v['validator']['withdrawable_epoch']) <= FAR_FUTURE:
+            withdrawable.append(i)
+        else:
+            results[i] = calculate_withdrawal_info(v, genesis_time, slots_per_epoch, seconds_per_slot, now=now)
+
+    if withdrawable:
+        epochs = np.fromiter(
+            (int(validators_data[i]['validator']['withdrawable_epoch']) for i in withdrawable),
+            dtype=np.int64, count=len(withdrawable)
+        )
+        timestamps = genesis_time + epochs * (slots_per_epoch * seconds_per_slot)
+        isos = np.datetime_as_string(timestamps.astype('datetime64[s]'), unit='s')
+        remaining = timestamps - int(now)
+
+        for i, iso, left in zip(withdrawable, isos.tolist(), remaining.tolist()):
+            withdrawal_time = (f"{iso}+00:00", left)
+            results[i] = calculate_withdrawal_info(validators_data[i], genesis_time, slots_per_epoch, seconds_per_slot, withdrawal_time, now)
+
+    return results
+
+def csv_row(result):
+    """Orders a result's fields for CSV output, formatting the GNO balance directly."""
+    row = [result.get(k, '') for k in CSV_FIELDNAMES]
+    balance = row[GNO_COLUMN]
+    if balance != '':
+        row[GNO_COLUMN] = f"{balance:.9f}"
+    return row
+
+def build_results(ident, original_pks, info, error=None):
+    """Builds one result row per original key resolving to a calculated (or missing) validator."""
+    results = []
+    for pk in original_pks:
+        if info:
+            # Each row carries its own YAML key, which the resume checkpoint looks up
+            if pk and pk != info['pubkey']:
+                results.append({**info, 'pubkey': pk})
+            else:
+                results.append(info)
+        elif error:
+            # The request itself failed, the validator may well exist
+            results.append({
+                'pubkey': pk or ident,
+                'withdrawable_epoch': 'Error/FetchFailed',
+                'withdrawable_time_iso': 'Error/FetchFailed',
+                'note': f'Fetch failed: {error}'
+            })
+        else:
+            # Handle not found
+            results.append({
+                'pubkey': pk or ident,
+                'withdrawable_epoch': 'Error/NotFound',
+                'withdrawable_time_iso': 'Error/NotFound',
+                'note': 'Validator not found on chain'
+            })
+    return results
+
 # --- File Loaders ---
 
 def load_keys_from_yaml(yaml_path):
@@ -127,7 +450,7 @@ def load_keys_from_yaml(yaml_path):
     keys = []
     try:
         with open(yaml_path, 'r') as f:
-            data = yaml.safe_load(f)
+            data = yaml.load(f, Loader=SafeLoader)
             if 'operators' not in data:
                 print("Error: YAML file must contain 'operators' key.")
                 return []
@@ -141,56 +464,254 @@ def load_keys_from_yaml(yaml_path):
         print(f"Error reading YAML file: {e}")
         return []
     
-    # Normalize keys
-    return [k.lower() for k in keys]
+    # Normalize keys, dropping duplicates listed under several operators
+    unique_keys = list(dict.fromkeys(k.lower() for k in keys))
+    if len(unique_keys) < len(keys):
+        print(f"Removed {len(keys) - len(unique_keys)} duplicate keys.")
+    return unique_keys
 
 def load_index_map_from_json(json_path):
     """Parses the JSON file to create a pubkey -> index map."""
     mapping = {}
     try:
-        with open(json_path, 'r') as f:
-            data = json.load(f)
-            if 'validators' not in data:
-                print("Error: JSON file must contain 'validators' list.")
-                return {}
-            
-            for v in data['validators']:
-                pubkey = v.get('pubkey', '').lower()
-                index = v.get('index')
-                if pubkey and index is not None:
-                    mapping[pubkey] = index
+        with open(json_path, 'rb') as f:
+            if ijson and os.path.getsize(json_path) > STREAM_JSON_THRESHOLD:
+                # Stream the validators array so it is never fully held in memory
+                validators = ijson.items(f, 'validators.item')
+            else:
+                data = orjson.loads(f.read()) if orjson else json.load(f)
+                if 'validators' not in data:
+                    print("Error: JSON file must contain 'validators' list.")
+                    return {}
+                validators = data['validators']
+
+            # Single comprehension, malformed rows are skipped by one guard
+            mapping = {
+                v['pubkey'].lower(): v['index']
+                for v in validators
+                if v.get('pubkey') and v.get('index') is not None
+            }
     except Exception as e:
         print(f"Error reading JSON file: {e}")
         return {}
     return mapping
 
+def print_withdrawal_info(r):
+    """Prints a single result, formatting its withdrawable time only at this point."""
+    withdrawable_time = r.get('withdrawable_time_iso')
+    time_remaining = r.get('time_remaining')
+    note = r.get('note')
+
+    if r.get('withdrawable_timestamp') is not None:
+        withdrawable_time = iso_utc(r['withdrawable_timestamp'])
+        remaining = int(r['withdrawable_timestamp'] - time.time())
+        if remaining > 0:
+            time_remaining = format_remaining(remaining)
+        else:
+            time_remaining = "0:00:00"
+            note = "Eligible for sweep"
+
+    print(f"\n--- Withdrawal Info for {r.get('pubkey')} (Index: {r.get('index')}) ---")
+    print(f"Status:             {r.get('status')}")
+    print(f"Withdrawable Epoch: {r.get('withdrawable_epoch')}")
+    print(f"Withdrawable Time:  {withdrawable_time}")
+    if time_remaining:
+        print(f"Time Remaining:     {time_remaining}")
+    if note:
+        print(f"Note:               {note}")
+
+def input_fingerprint(args):
+    """Describes the inputs of a batch run, so a checkpoint is only resumed by the same run."""
+    files = {}
+    for path in (args.yaml, args.json):
+        if path and os.path.exists(path):
+            st = os.stat(path)
+            files[os.path.abspath(path)] = [st.st_size, st.st_mtime]
+    return {'node': args.node, 'yaml': args.yaml, 'json': args.json, 'preflight': args.preflight, 'files': files}
+
+def load_checkpoint(partial_path, fingerprint):
+    """Reads the original keys already written to the partial CSV of an interrupted run.
+
+    Error rows are dropped from the partial file so those validators are
+    fetched again. A checkpoint left by a run with other inputs is discarded.
+    """
+    meta_path = partial_path + ".meta"
+    if not os.path.exists(partial_path):
+        return set()
+    try:
+        with open(meta_path) as f:
+            saved = json.load(f)
+    except Exception:
+        saved = None
+    if saved != fingerprint:
+        print(f"Warning: {partial_path} was written for different inputs, starting over.")
+        return set()
+
+    try:
+        with open(partial_path, newline='') as f:
+            reader = csv.reader(f)
+            header = next(reader, None)
+            rows = list(reader)
+        epoch_col = CSV_FIELDNAMES.index('withdrawable_epoch')
+        kept = [row for row in rows if not row[epoch_col].startswith('Error/')]
+        if len(kept) < len(rows):
+            # Rewrite without the error rows, they are appended again once retried
+            with open(partial_path, 'w', newline='') as f:
+                writer = csv.writer(f)
+                writer.writerow(header)
+                writer.writerows(kept)
+        return {row[0] for row in kept}
+    except Exception as e:
+        print(f"Error reading checkpoint file: {e}")
+        return set()
+
+def save_checkpoint_meta(partial_path, fingerprint):
+    """Records which inputs the partial CSV belongs to."""
+    with open(partial_path + ".meta", 'w') as f:
+        json.dump(fingerprint, f)
+
 # --- Main Logic ---
 
-def main():
-    parser = argparse.ArgumentParser(description="Get ETH withdrawable time for validators")
-    parser.add_argument("validator_id", nargs="?", help="Single Validator Index or Public Key")
-    parser.add_argument("--yaml", help="Path to YAML file with operator keys")
-    parser.add_argument("--json", help="Path to JSON file with validator indices")
-    parser.add_argument("--out", default="withdrawal_times.csv", help="Output CSV file path (default: withdrawal_times.csv)")
-    parser.add_argument("--node", default="http://localhost:5052", help="Beacon Node URL")
-    parser.add_argument("--sleep", type=float, default=0.0, help="Sleep between requests in seconds")
+def open_cache(args):
+    """Opens the on-disk response cache, or returns None if disabled or diskcache is missing."""
+    if args.no_cache or args.cache_ttl <= 0 or diskcache is None:
+        return None
+    return diskcache.Cache(CACHE_DIR)
 
-    args = parser.parse_args()
+async def write_batch_csv(args, validators_to_check, fan_out, csvfile, genesis_time, slots_per_epoch, seconds_per_slot, client, bucket, cache=None, write_header=True):
+    """Bulk fetches the batch and streams each chunk's rows to the CSV as it completes.
+
+    Returns the number of chunks that could not be fetched.
+    """
+    # Plain csv.writer with list rows, no per-row dict building/lookup by DictWriter
+    writer = csv.writer(csvfile)
+    if write_header:
+        writer.writerow(CSV_FIELDNAMES)
+
+    def write_result(r):
+        writer.writerow(csv_row(r))
+
+    def write_rows(idents, validators_data):
+        infos = calculate_withdrawal_batch(validators_data, genesis_time, slots_per_epoch, seconds_per_slot)
+        writer.writerows(
+            csv_row(r)
+            for ident, info in zip(idents, infos)
+            for r in build_results(ident, fan_out[ident], info)
+        )
+
+    ids = [ident for ident, _ in validators_to_check]
+    # A blanket sleep only makes sense for strictly sequential requests,
+    # otherwise the semaphore, token bucket and backoff pace the node
+    sleep = args.sleep if args.concurrency == 1 else 0.0
+    if args.sleep > 0 and not sleep:
+        print("Ignoring --sleep, it only applies with --concurrency 1.")
+
+    # Serve what we can from the cache, only the misses go to the node
+    to_fetch = ids
+    if cache is not None:
+        to_fetch = []
+        cached_ids, cached_data = [], []
+        for ident in ids:
+            val_data = cache.get((args.node, ident))
+            if val_data is None:
+                to_fetch.append(ident)
+            else:
+                cached_ids.append(ident)
+                cached_data.append(val_data)
+        if cached_ids:
+            write_rows(cached_ids, cached_data)
+            print(f"Served {len(cached_ids)} validators from cache.")
+
+    # Preflight: only exiting/exited validators need their data, everyone
+    # else is reported as active without any per-key lookup
+    if args.preflight and to_fetch:
+        exited = await preflight_exited(args.node, client, bucket)
+        if exited is not None:
+            exited_ids, exited_data = [], []
+            for ident in to_fetch:
+                val_data = exited.get(ident.lower())
+                if val_data:
+                    exited_ids.append(ident)
+                    exited_data.append(val_data)
+                else:
+                    for pk in fan_out[ident]:
+                        write_result({
+                            'pubkey': pk,
+                            'withdrawable_epoch': 'Pending',
+                            'withdrawable_time_iso': 'N/A',
+                            # Not looked up, the preflight only lists exiting/exited validators
+                            'status': 'active_ongoing (assumed)',
+                            'note': 'Active (not exited)'
+                        })
+            write_rows(exited_ids, exited_data)
+            print(f"Preflight found {len(exited_ids)} exiting/exited validators, {len(to_fetch) - len(exited_ids)} assumed active.")
+            to_fetch = []
+    processed = len(ids) - len(to_fetch)
+
+    requests_made = 0
+    failed_chunks = 0
+    started = time.monotonic()
+
+    async for chunk_ids, entries, error in fetch_validators_bulk(args.node, to_fetch, client, bucket, args.concurrency, sleep):
+        requests_made += 1
+        processed += len(chunk_ids)
+        if entries is None:
+            failed_chunks += 1
+            writer.writerows(
+                csv_row(r)
+                for ident in chunk_ids
+                for r in build_results(ident, fan_out[ident], None, error)
+            )
+            csvfile.flush()
+            print(f"Processed {processed}/{len(ids)}...")
+            continue
+
+        # Map returned entries back to the requested identifiers
+        by_id = {}
+        for entry in entries:
+            by_id[str(entry['index'])] = entry
+            by_id[entry['validator']['pubkey'].lower()] = entry
+
+        chunk_data = [by_id.get(ident.lower()) for ident in chunk_ids]
+        if cache is not None:
+            for ident, val_data in zip(chunk_ids, chunk_data):
+                if val_data:
+                    cache.set((args.node, ident), val_data, expire=args.cache_ttl)
+        write_rows(chunk_ids, chunk_data)
+        csvfile.flush()
+        print(f"Processed {processed}/{len(ids)}...")
 
-    # Setup Session
-    session = requests.Session()
+    elapsed = time.monotonic() - started
+    if requests_made and elapsed > 0:
+        print(f"Made {requests_made} bulk requests in {elapsed:.1f}s ({requests_made / elapsed:.1f} req/s).")
+    return failed_chunks
+
+async def async_main(args):
+    """Runs the whole check on a single HTTP/2 capable client, reused end-to-end."""
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    transport = httpx.AsyncHTTPTransport(http2=True, limits=limits, retries=CONNECT_RETRIES)
+    async with httpx.AsyncClient(transport=transport, timeout=HTTP_TIMEOUT, follow_redirects=True) as client:
+        return await check_validators(args, client)
+
+async def check_validators(args, client):
+    """Fetches chain params, resolves the validators to check and reports their withdrawal times.
+
+    Returns a non-zero exit code if some validators could not be fetched.
+    """
+    bucket = TokenBucket(args.rate, capacity=args.concurrency)
+    cache = open_cache(args)
 
     # 1. Init Chain Config
     print(f"Connecting to node: {args.node}")
-    config = get_chain_config(args.node, session)
+    config = await get_chain_config(args.node, client, bucket)
     if not config:
         print("Failed to get chain config. Exiting.")
-        return
+        return 1
     
-    genesis_time = get_genesis_time(args.node, session)
+    genesis_time = await get_genesis_time(args.node, client, bucket)
     if not genesis_time:
         print("Failed to get genesis time. Exiting.")
-        return
+        return 1
 
     slots_per_epoch = config['SLOTS_PER_EPOCH']
     seconds_per_slot = config['SECONDS_PER_SLOT']
@@ -198,9 +719,12 @@ def main():
 
     # 2. Determine Mode
     validators_to_check = [] # List of (identifier, original_pubkey_if_known)
+    fan_out = {} # identifier -> original pubkeys sharing that identifier
 
     if args.validator_id:
         validators_to_check.append((args.validator_id, None))
+        # Batch mode (--yaml alongside an id) writes this single validator's row
+        fan_out[args.validator_id] = [None]
     
     elif args.yaml:
         print(f"Reading keys from {args.yaml}...")
@@ -213,84 +737,103 @@ def main():
             index_map = load_index_map_from_json(args.json)
             print(f"Loaded {len(index_map)} indices.")
         
-        # Prepare list: use index if available, else pubkey
+        # Prepare list: use index if available, else pubkey. Each identifier is
+        # fetched once and fanned out to every original key resolving to it.
         skipped_count = 0
         for pk in pubkeys:
             if args.json:
                 # If JSON map is provided, STRICTLY require the key to be in it
                 if pk in index_map:
-                    validators_to_check.append((index_map[pk], pk))
+                    ident = str(index_map[pk])
                 else:
                     skipped_count += 1
+                    continue
             else:
                 # Fallback if no JSON provided (though user requested skipping based on JSON, this handles the case where they forget the flag)
-                validators_to_check.append((pk, pk))
+                ident = pk
+
+            if ident not in fan_out:
+                fan_out[ident] = []
+                validators_to_check.append((ident, pk))
+            fan_out[ident].append(pk)
         
         if skipped_count > 0:
             print(f"Skipped {skipped_count} keys not found in JSON map.")
 
-    else:
-        print("Error: Please provide either a validator_id or a --yaml file.")
-        parser.print_help()
-        return
-
     # 3. Process Validators
-    results = []
+    if args.yaml:
+        # Rows are checkpointed to a .partial file, resume from it if a previous run was interrupted
+        partial_path = args.out + ".partial"
+        fingerprint = input_fingerprint(args)
+        done = load_checkpoint(partial_path, fingerprint)
+        if done:
+            validators_to_check = [
+                (ident, pk) for ident, pk in validators_to_check
+                if not all(p in done for p in fan_out[ident])
+            ]
+            print(f"Resuming from {partial_path}, {len(done)} rows already written.")
+
     print(f"Processing {len(validators_to_check)} validators...")
-    
-    for i, (ident, original_pk) in enumerate(validators_to_check):
-        if i > 0 and i % 10 == 0:
-            print(f"Processed {i}/{len(validators_to_check)}...")
-        
-        val_data = fetch_validator_data(args.node, ident, session)
-        
-        if val_data:
-            info = calculate_withdrawal_info(val_data, genesis_time, slots_per_epoch, seconds_per_slot)
-            results.append(info)
-        else:
-            # Handle not found
-            results.append({
-                'pubkey': original_pk or ident,
-                'withdrawable_epoch': 'Error/NotFound',
-                'withdrawable_time_iso': 'Error/NotFound',
-                'note': 'Validator not found on chain'
-            })
-        
-        if args.sleep > 0:
-            time.sleep(args.sleep)
 
-    # 4. Output
     if args.yaml:
-        # Batch mode -> CSV
+        # Batch mode -> bulk fetch concurrently, streaming rows to CSV
         print(f"Writing results to {args.out}...")
-        fieldnames = ['pubkey', 'withdrawable_epoch', 'withdrawable_time_iso', 'time_remaining', 'effective_balance_gno', 'status', 'note']
-        
         try:
-            with open(args.out, 'w', newline='') as csvfile:
-                writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
-                writer.writeheader()
-                for r in results:
-                    # Filter keys to match fieldnames
-                    row = {k: r.get(k, '') for k in fieldnames}
-                    writer.writerow(row)
+            save_checkpoint_meta(partial_path, fingerprint)
+            with open(partial_path, 'a' if done else 'w', newline='', buffering=1 << 20) as csvfile:
+                failed_chunks = await write_batch_csv(args, validators_to_check, fan_out, csvfile, genesis_time, slots_per_epoch, seconds_per_slot, client, bucket, cache, write_header=not done)
+            os.replace(partial_path, args.out)
+            os.remove(partial_path + ".meta")
+            if failed_chunks:
+                print(f"Done, but {failed_chunks} bulk requests failed. Their rows are marked 'Fetch failed'.")
+                return 1
             print("Done.")
         except Exception as e:
             print(f"Error writing CSV: {e}")
+            return 1
 
     else:
         # Single mode -> Print to console
-        if not results:
-            print("No data found.")
-        else:
-            r = results[0]
-            print(f"\n--- Withdrawal Info for {r.get('pubkey')} (Index: {r.get('index')}) ---")
-            print(f"Status:             {r.get('status')}")
-            print(f"Withdrawable Epoch: {r.get('withdrawable_epoch')}")
-            print(f"Withdrawable Time:  {r.get('withdrawable_time_iso')}")
-            if r.get('time_remaining'):
-                print(f"Time Remaining:     {r.get('time_remaining')}")
-            if r.get('note'):
-                print(f"Note:               {r.get('note')}")
+        val_data = await fetch_validator_cached(args.node, args.validator_id, client, bucket, cache, args.cache_ttl)
+        info = calculate_withdrawal_info(val_data, genesis_time, slots_per_epoch, seconds_per_slot, mode='print')
+        print_withdrawal_info(build_results(args.validator_id, [None], info)[0])
+
+def positive_int(value):
+    """argparse type for options that must be a whole number of at least 1."""
+    try:
+        number = int(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid int value: '{value}'")
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"must be at least 1, got {number}")
+    return number
+
+def main():
+    parser = argparse.ArgumentParser(description="Get ETH withdrawable time for validators")
+    parser.add_argument("validator_id", nargs="?", help="Single Validator Index or Public Key")
+    parser.add_argument("--yaml", help="Path to YAML file with operator keys")
+    parser.add_argument("--json", help="Path to JSON file with validator indices")
+    parser.add_argument("--out", default="withdrawal_times.csv", help="Output CSV file path (default: withdrawal_times.csv)")
+    parser.add_argument("--node", default="http://localhost:5052", help="Beacon Node URL")
+    parser.add_argument("--concurrency", type=positive_int, default=DEFAULT_CONCURRENCY, help=f"Max requests in flight during batch processing (default: {DEFAULT_CONCURRENCY})")
+    parser.add_argument("--rate", type=float, default=20.0, help="Max requests per second sent to the node (default: 20)")
+    parser.add_argument("--sleep", type=float, default=0.0, help="Sleep between requests in seconds, only honored with --concurrency 1")
+    parser.add_argument("--preflight", action="store_true", help="Fetch all exiting/exited validators in one call and report every other key as active")
+    parser.add_argument("--cache-ttl", type=float, default=60.0, help="Seconds to reuse cached beacon responses (default: 60)")
+    parser.add_argument("--no-cache", action="store_true", help="Always query the beacon node, bypassing the response cache")
+
+    args = parser.parse_args()
+
+    if not args.validator_id and not args.yaml:
+        print("Error: Please provide either a validator_id or a --yaml file.")
+        parser.print_help()
+        return
+
+    if args.rate <= 0:
+        parser.error("--rate must be greater than 0")
+
+    if asyncio.run(async_main(args)):
+        sys.exit(1)
 
 if __name__ == "__main__":
     main()